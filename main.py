@@ -1,12 +1,13 @@
 import sys
 import numpy as np
 import cv2
-from PyQt5.QtWidgets import QSizePolicy,QSpacerItem, QProgressBar, QApplication, QFrame, QComboBox, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QLabel, QSlider, QRadioButton, QButtonGroup
+from PyQt5.QtWidgets import QSizePolicy,QSpacerItem, QProgressBar, QApplication, QFrame, QComboBox, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QFileDialog, QLabel, QSlider, QRadioButton, QButtonGroup, QSpinBox
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QPixmap, QImage
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from matplotlib.widgets import RectangleSelector
+from masks import MASK_SHAPES, CUTOFF_SHAPES, DEFAULT_CUTOFF, DEFAULT_BUTTERWORTH_ORDER, build_mix_kernel, mix_components
 import logging
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -76,6 +77,29 @@ class ImageData(QWidget):
         H_radio_layout.addWidget(self.real_radio)
         H_radio_layout.addWidget(self.imaginary_radio)
 
+        self.mask_combo = QComboBox()
+        self.mask_combo.setObjectName("mask_combo")
+        self.mask_combo.addItems(MASK_SHAPES)
+        self.mask_combo.currentIndexChanged.connect(self.update_mask_controls)
+
+        self.cutoff_slider = QSlider(Qt.Orientation.Horizontal)
+        self.cutoff_slider.setRange(1, 100)
+        self.cutoff_slider.setValue(int(DEFAULT_CUTOFF * 100))
+        self.cutoff_slider.setToolTip("Cutoff as a fraction of the radius of the inscribed ellipse")
+
+        self.cutoff_label = QLabel(f"{self.cutoff_slider.value()}%")
+        self.cutoff_slider.valueChanged.connect(lambda value: self.cutoff_label.setText(f"{value}%"))
+
+        self.order_spinbox = QSpinBox()
+        self.order_spinbox.setRange(1, 10)
+        self.order_spinbox.setValue(DEFAULT_BUTTERWORTH_ORDER)
+        self.order_spinbox.setPrefix("Order ")
+
+        H_mask_layout = QHBoxLayout()
+        H_mask_layout.addWidget(self.mask_combo)
+        H_mask_layout.addWidget(self.cutoff_slider)
+        H_mask_layout.addWidget(self.cutoff_label)
+        H_mask_layout.addWidget(self.order_spinbox)
 
 
         self.label.mouseDoubleClickEvent = lambda event: self.load_image()
@@ -87,6 +111,7 @@ class ImageData(QWidget):
         self.layout.addLayout(H_layout)
         self.layout.addSpacerItem(QSpacerItem(0,15,QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Minimum))
         self.layout.addWidget(H_radio_frame)
+        self.layout.addLayout(H_mask_layout)
 
         self.setLayout(self.layout)
         self.rectangle_selector = RectangleSelector(
@@ -101,6 +126,14 @@ class ImageData(QWidget):
         
         self.real_radio.setEnabled(False)
         self.imaginary_radio.setEnabled(False)
+        self.update_mask_controls()
+
+    def update_mask_controls(self):
+        '''Enable the cutoff and order controls only for the shapes that use them'''
+        shape = self.mask_combo.currentText()
+        self.cutoff_slider.setEnabled(shape in CUTOFF_SHAPES)
+        self.cutoff_label.setEnabled(shape in CUTOFF_SHAPES)
+        self.order_spinbox.setEnabled(shape == "Butterworth")
 
     def start_mouse_drag(self, event):
         '''Start tracking the mouse drag'''
@@ -446,6 +479,9 @@ class ImageReconstructionApp(QWidget):
             slider.valueChanged.connect(lambda: self.process_images())
         for image in [self.image_1, self.image_2, self.image_3, self.image_4]:
             image.component_group.buttonClicked.connect(self.process_images)
+            image.mask_combo.currentIndexChanged.connect(lambda: self.process_images())
+            image.cutoff_slider.valueChanged.connect(lambda: self.process_images())
+            image.order_spinbox.valueChanged.connect(lambda: self.process_images())
         self.current_output_port.magnitude_phase_mode.toggled.connect(lambda: self.update_component_radio_buttons())
         self.current_output_port.real_imaginary_mode.toggled.connect(lambda: self.update_component_radio_buttons())
         self.current_output_port.inside_region_radio.toggled.connect(lambda: self.process_images())
@@ -519,109 +555,55 @@ class ImageReconstructionApp(QWidget):
                     image.rectangle_selector.update()
                     self.process_images()
                     
-    def get_outer_region(self, all_region, inner_region):
-        padded_inner_region = np.pad(inner_region, ((0, all_region.shape[0] - inner_region.shape[0]),
-                                            (0, all_region.shape[1] - inner_region.shape[1])),
-                             mode='constant', constant_values=0)
-
-        common_elements = np.isin(all_region, padded_inner_region)
-
-        outer_region = np.where(common_elements, 0, all_region)
-        return outer_region                        
-    
-                    
     def process_images(self):
         logging.info("Processing images")
         output_port = self.current_output_port
         output_port.progress_bar.setValue(20)
         
         images = [self.image_1, self.image_2, self.image_3, self.image_4]
+        outer = output_port.outside_region_radio.isChecked()
 
-        
-        if output_port.inside_region_radio.isChecked():
-            if all(image.magnitude_spectrum is not None for image in images):
-                magnitude_components = np.zeros_like(images[0].magnitude_spectrum[
-                        self.selected_region[0] : self.selected_region[1],
-                        self.selected_region[2] : self.selected_region[3]])
-                phase_components = np.zeros_like(images[0].phase_spectrum[
-                        self.selected_region[0] : self.selected_region[1],
-                        self.selected_region[2] : self.selected_region[3]])
-                real_components = np.zeros_like(images[0].real_spectrum[
-                        self.selected_region[0] : self.selected_region[1],
-                        self.selected_region[2] : self.selected_region[3]])
-                imaginary_components = np.zeros_like(images[0].imaginary_spectrum[
-                        self.selected_region[0] : self.selected_region[1],
-                        self.selected_region[2] : self.selected_region[3]])
-
-                for i in range(4):
-                    
-                    weight = output_port.weight_sliders[i].value()
-                    logging.info(f"Slider {i}: weight = {weight}")
-                    if output_port.magnitude_phase_mode.isChecked():
-                        if images[i].magnitude_radio.isChecked():
-                            magnitude_components += weight * images[i].magnitude_spectrum[
-                                self.selected_region[0] : self.selected_region[1],
-                                self.selected_region[2] : self.selected_region[3]]
-                        elif images[i].phase_radio.isChecked():
-                            phase_components += weight * images[i].phase_spectrum[
-                                self.selected_region[0] : self.selected_region[1],
-                                self.selected_region[2] : self.selected_region[3]]
-                    
-                    else:
-                        if images[i].real_radio.isChecked():
-                            real_components += weight * images[i].real_spectrum[
-                                self.selected_region[0] : self.selected_region[1],
-                                self.selected_region[2] : self.selected_region[3]]
-                        elif images[i].imaginary_radio.isChecked():
-                            imaginary_components += weight * images[i].imaginary_spectrum[
-                                self.selected_region[0] : self.selected_region[1],
-                                self.selected_region[2] : self.selected_region[3]]
-        else:
-            if all(image.magnitude_spectrum is not None for image in images):
-                magnitude_components = np.zeros_like(images[0].magnitude_spectrum[
-                        0 : 250,
-                        0 : 250])
-                phase_components = np.zeros_like(images[0].phase_spectrum[
-                        0 : 250,
-                        0 : 250])
-                real_components = np.zeros_like(images[0].real_spectrum[
-                        0 : 250,
-                        0 : 250])
-                imaginary_components = np.zeros_like(images[0].imaginary_spectrum[
-                        0 : 250,
-                        0 : 250])
-
-
-                for i in range(4):
-                    weight = output_port.weight_sliders[i].value()
-                    print(f"Slider {i}: weight = {weight}")
-                    
-                    if output_port.magnitude_phase_mode.isChecked():
-                        if images[i].magnitude_radio.isChecked():
-
-                            magnitude_components += weight* self.get_outer_region(images[i].magnitude_spectrum, images[i].magnitude_spectrum[
-                            self.selected_region[0] : self.selected_region[1],
-                            self.selected_region[2] : self.selected_region[3]])
-                        
-                        elif images[i].phase_radio.isChecked():                        
-                            phase_components += weight * self.get_outer_region(images[i].phase_spectrum, images[i].phase_spectrum[
-                            self.selected_region[0] : self.selected_region[1],
-                            self.selected_region[2] : self.selected_region[3]])
-                    else:
-
-                        if images[i].real_radio.isChecked():
-                            real_components += weight * self.get_outer_region(images[i].real_spectrum, images[i].real_spectrum[
-                            self.selected_region[0] : self.selected_region[1],
-                            self.selected_region[2] : self.selected_region[3]])
-                        
-                        elif images[i].imaginary_radio.isChecked():
-                            imaginary_components += weight * self.get_outer_region(images[i].imaginary_spectrum, images[i].imaginary_spectrum[
-                            self.selected_region[0] : self.selected_region[1],
-                            self.selected_region[2] : self.selected_region[3]])
+        terms = {"magnitude": [], "phase": [], "real": [], "imaginary": []}
+
+        for i in range(4):
+            weight = output_port.weight_sliders[i].value()
+            logging.info(f"Slider {i}: weight = {weight}")
+            if weight == 0:
+                continue
+
+            if output_port.magnitude_phase_mode.isChecked():
+                if images[i].magnitude_radio.isChecked():
+                    name, spectrum = "magnitude", images[i].magnitude_spectrum
+                elif images[i].phase_radio.isChecked():
+                    name, spectrum = "phase", images[i].phase_spectrum
+                else:
+                    continue
             else:
-                print("Please load images.") 
-                    
-        
+                if images[i].real_radio.isChecked():
+                    name, spectrum = "real", images[i].real_spectrum
+                elif images[i].imaginary_radio.isChecked():
+                    name, spectrum = "imaginary", images[i].imaginary_spectrum
+                else:
+                    continue
+
+            # Phase is an angle, not an amplitude, so it is mixed unmasked; the taper
+            # on the magnitude already filters the rebuilt spectrum.
+            if name == "phase":
+                kernel = weight
+            else:
+                height, width = spectrum.shape
+                kernel = build_mix_kernel(weight, images[i].mask_combo.currentText(), height, width,
+                                          tuple(self.selected_region), outer,
+                                          images[i].cutoff_slider.value() / 100,
+                                          images[i].order_spinbox.value())
+            terms[name].append((kernel, spectrum))
+
+        size = images[0].magnitude_spectrum.shape
+        magnitude_components = mix_components(terms["magnitude"], size)
+        phase_components = mix_components(terms["phase"], size)
+        real_components = mix_components(terms["real"], size)
+        imaginary_components = mix_components(terms["imaginary"], size)
+
         total_magnitude_weight = sum(output_port.weight_sliders[i].value() for i in range(4) if images[i].magnitude_radio.isChecked())
         total_phase_weight = sum(output_port.weight_sliders[i].value() for i in range(4) if images[i].phase_radio.isChecked())
         total_real_weight = sum(output_port.weight_sliders[i].value() for i in range(4) if images[i].real_radio.isChecked())
@@ -0,0 +1,64 @@
+import numpy as np
+from functools import lru_cache
+import logging
+
+MASK_SHAPES = ["Rectangle", "Circle", "Annulus", "Gaussian", "Butterworth"]
+CUTOFF_SHAPES = ["Annulus", "Gaussian", "Butterworth"]
+DEFAULT_CUTOFF = 0.5
+DEFAULT_BUTTERWORTH_ORDER = 2
+MIN_ANNULUS_WIDTH = 0.1
+
+
+@lru_cache(maxsize=64)
+def build_frequency_mask(shape, height, width, region, outer=False,
+                         cutoff=DEFAULT_CUTOFF, order=DEFAULT_BUTTERWORTH_ORDER):
+    '''Build a read-only, cached (height, width) mask over the shifted spectrum for region [y0, y1, x0, x1]'''
+    logging.info(f"Building {shape} mask for region {region} (outer={outer}, cutoff={cutoff}, order={order})")
+
+    y0, y1, x0, x1 = region
+    y0, y1 = sorted((y0, y1))
+    x0, x1 = sorted((x0, x1))
+
+    if shape == "Rectangle":
+        mask = np.zeros((height, width))
+        mask[y0:y1, x0:x1] = 1.0
+    else:
+        cy, cx = (y0 + y1) / 2, (x0 + x1) / 2
+        ry, rx = max((y1 - y0) / 2, 1e-5), max((x1 - x0) / 2, 1e-5)
+        y, x = np.ogrid[:height, :width]
+        radius = np.hypot((y - cy) / ry, (x - cx) / rx)
+
+        if shape == "Circle":
+            mask = (radius <= 1).astype(float)
+        elif shape == "Annulus":
+            inner = min(cutoff, 1 - MIN_ANNULUS_WIDTH)
+            mask = ((radius >= inner) & (radius <= 1)).astype(float)
+        elif shape == "Gaussian":
+            mask = np.exp(-0.5 * (radius / cutoff) ** 2)
+        elif shape == "Butterworth":
+            mask = 1 / (1 + (radius / cutoff) ** (2 * order))
+        else:
+            raise ValueError(f"Unknown mask shape: {shape}")
+
+    if outer:
+        mask = 1 - mask
+    mask.setflags(write=False)
+    return mask
+
+
+@lru_cache(maxsize=256)
+def build_mix_kernel(weight, *mask_args):
+    '''Return weight times build_frequency_mask(*mask_args), cached and read-only'''
+    kernel = weight * build_frequency_mask(*mask_args)
+    kernel.setflags(write=False)
+    return kernel
+
+
+def mix_components(terms, size):
+    '''Sum kernel * spectrum over the (kernel, spectrum) terms; a kernel may be a plain weight'''
+    components = np.zeros(size)
+    buffer = np.empty(size)
+    for kernel, spectrum in terms:
+        np.multiply(kernel, spectrum, out=buffer)
+        components += buffer
+    return components
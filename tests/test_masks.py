@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from masks import MASK_SHAPES, build_frequency_mask, build_mix_kernel, mix_components
+
+
+def test_rectangle_matches_slice():
+    region = (40, 120, 60, 200)
+    mask = build_frequency_mask("Rectangle", 250, 250, region)
+
+    expected = np.zeros((250, 250))
+    expected[40:120, 60:200] = 1.0
+    assert np.array_equal(mask, expected)
+
+
+def test_rectangle_ignores_drag_direction():
+    forward = build_frequency_mask("Rectangle", 250, 250, (40, 120, 60, 200))
+    backward = build_frequency_mask("Rectangle", 250, 250, (120, 40, 200, 60))
+    assert np.array_equal(forward, backward)
+
+
+@pytest.mark.parametrize("shape", MASK_SHAPES)
+def test_outer_is_complement(shape):
+    inner = build_frequency_mask(shape, 250, 250, (75, 175, 50, 200))
+    outer = build_frequency_mask(shape, 250, 250, (75, 175, 50, 200), True)
+    assert np.allclose(outer, 1 - inner)
+
+
+@pytest.mark.parametrize("shape", MASK_SHAPES)
+def test_mask_is_read_only(shape):
+    mask = build_frequency_mask(shape, 250, 250, (0, 250, 0, 250))
+    assert not mask.flags.writeable
+    with pytest.raises(ValueError):
+        mask[0, 0] = 1.0
+
+
+@pytest.mark.parametrize("region", [(0, 250, 0, 250), (100, 150, 100, 150)])
+def test_annulus_non_empty_for_square_region(region):
+    mask = build_frequency_mask("Annulus", 250, 250, region, cutoff=0.5)
+    assert np.count_nonzero(mask) > 0.1 * (region[1] - region[0]) * (region[3] - region[2])
+
+
+def test_annulus_keeps_ring_at_full_cutoff():
+    mask = build_frequency_mask("Annulus", 250, 250, (0, 250, 0, 250), cutoff=1.0)
+    assert np.count_nonzero(mask) > 0.1 * 250 * 250
+
+
+def test_gaussian_filters_default_region():
+    mask = build_frequency_mask("Gaussian", 250, 250, (0, 250, 0, 250))
+    assert mask.max() == pytest.approx(1.0, abs=1e-3)
+    assert mask.min() < 0.05
+
+
+def test_circle_edge_on_inscribed_ellipse():
+    mask = build_frequency_mask("Circle", 250, 250, (100, 150, 50, 200))
+    assert mask[125, 125] == 1.0
+    assert mask[125, 50] == 1.0 and mask[125, 49] == 0.0
+    assert mask[125, 200] == 1.0 and mask[125, 201] == 0.0
+    assert mask[100, 125] == 1.0 and mask[99, 125] == 0.0
+    assert mask[100, 50] == 0.0
+
+
+def test_butterworth_half_power_at_cutoff():
+    mask = build_frequency_mask("Butterworth", 250, 250, (25, 225, 25, 225), cutoff=0.5)
+    assert mask[125, 125] == pytest.approx(1.0)
+    assert mask[125, 175] == pytest.approx(0.5)
+
+
+def test_butterworth_steeper_with_order():
+    low = build_frequency_mask("Butterworth", 250, 250, (25, 225, 25, 225), cutoff=0.5, order=1)
+    high = build_frequency_mask("Butterworth", 250, 250, (25, 225, 25, 225), cutoff=0.5, order=4)
+    assert high[125, 160] > low[125, 160]
+    assert high[125, 190] < low[125, 190]
+
+
+def test_annulus_zero_inside_cutoff():
+    mask = build_frequency_mask("Annulus", 250, 250, (25, 225, 25, 225), cutoff=0.5)
+    assert mask[125, 125] == 0.0
+    assert mask[125, 170] == 0.0
+    assert mask[125, 180] == 1.0
+    assert mask[125, 226] == 0.0
+
+
+def test_mix_kernel_folds_weight():
+    kernel = build_mix_kernel(30, "Gaussian", 250, 250, (75, 175, 75, 175))
+    assert np.allclose(kernel, 30 * build_frequency_mask("Gaussian", 250, 250, (75, 175, 75, 175)))
+    assert not kernel.flags.writeable
+
+
+def test_mix_components_sums_weighted_terms():
+    rng = np.random.default_rng(1)
+    first, second = rng.random((250, 250)), rng.random((250, 250))
+    kernel = build_mix_kernel(20, "Circle", 250, 250, (50, 200, 50, 200))
+
+    mixed = mix_components([(kernel, first), (5, second)], (250, 250))
+    assert np.allclose(mixed, kernel * first + 5 * second)
+    assert np.array_equal(mix_components([], (250, 250)), np.zeros((250, 250)))
+
+
+def test_masked_mix_matches_low_pass():
+    image = np.random.default_rng(0).random((250, 250)) * 255
+    spectrum = np.fft.fftshift(np.fft.fft2(image))
+    region = (75, 175, 75, 175)
+    weight = 40
+
+    magnitude = mix_components([(build_mix_kernel(weight, "Gaussian", 250, 250, region), np.abs(spectrum))],
+                               (250, 250)) / weight
+    phase = mix_components([(weight, np.angle(spectrum))], (250, 250)) / weight
+    reconstructed = np.abs(np.fft.ifft2(magnitude * np.exp(1j * phase)))
+
+    low_pass = np.abs(np.fft.ifft2(np.fft.ifftshift(build_frequency_mask("Gaussian", 250, 250, region) * spectrum)))
+    assert np.allclose(reconstructed, low_pass)
+
+
+def test_unknown_shape_raises():
+    with pytest.raises(ValueError):
+        build_frequency_mask("Hexagon", 250, 250, (0, 250, 0, 250))